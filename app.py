@@ -1,10 +1,10 @@
 import streamlit as st
 import pandas as pd
-import joblib
-import os
+import numpy as np
 import altair as alt
-import calendar
+import html
 from datetime import datetime # Added for smart defaults
+from model_loader import MONTH_LIST, MONTH_MAP, build_model_input, load_artifacts
 
 # ==========================================
 # 1. CONFIGURATION & SETUP
@@ -17,20 +17,127 @@ st.set_page_config(
 
 MODEL_FILE = 'production_ai_brain.pkl'
 
+# Rows shown in the on-page table; the CSV download always has every product
+TABLE_ROW_LIMIT = 50
+
 # ==========================================
-# 2. MODEL LOADING LOGIC
+# 2. FORECAST LOGIC
 # ==========================================
-@st.cache_resource
-def load_ai_brain():
-    if not os.path.exists(MODEL_FILE):
-        st.error(f"🚨 Critical Error: '{MODEL_FILE}' not found.")
-        st.warning("Please run 'train_model.py' first to generate the AI brain.")
-        st.stop()
-    return joblib.load(MODEL_FILE)
+@st.cache_data(persist="disk", max_entries=256)
+def compute_forecast(year: int, month_num: int, version: str) -> pd.DataFrame:
+    """Predicts quantities for every product, memoized per (year, month).
+
+    Results are persisted to disk so they survive server restarts; ``version``
+    only feeds the cache key, so a retrained model never serves stale rows.
+    """
+    artifacts = load_artifacts(MODEL_FILE)
+    model = artifacts['model']
+    all_products = artifacts['product_names']
+
+    # 1. Predict (the forecast year is precomputed at load time)
+    if year == artifacts['forecast_year']:
+        predictions = artifacts['pred_table'][month_num - 1]
+    else:
+        input_data = build_model_input(year, [month_num], artifacts['product_ids'])
+        predictions = model.predict(input_data)
+
+    # 2. Format Results (highest quantity first)
+    # Order the arrays up front so the frame is built once, already sorted;
+    # int32 halves the bytes sent to the chart and table
+    preds_int = predictions.astype(np.int32, copy=False)
+    order = np.argsort(-preds_int, kind='stable')
+
+    return pd.DataFrame({
+        'Product Name': all_products[order],
+        'Suggested Quantity': preds_int[order]
+    }, copy=False)
+
+@st.cache_data(max_entries=24)
+def build_chart(results: pd.DataFrame) -> alt.Chart:
+    """Builds the production bar chart, memoized on the results' contents.
+
+    ``results`` is already in descending order, so the y-axis keeps row order
+    instead of asking Vega to sort again in the browser.
+    """
+    return alt.Chart(results).mark_bar(cornerRadius=5).encode(
+        x=alt.X('Suggested Quantity', title='Quantity'),
+        y=alt.Y('Product Name', sort=None, title='Product'),
+        color=alt.Color('Suggested Quantity', scale=alt.Scale(scheme='greens'), legend=None),
+        tooltip=['Product Name', 'Suggested Quantity']
+    ).properties(height=350)
+
+def build_metric_grid(names, quantities, columns: int = 3) -> str:
+    """Renders all metric cards as one HTML grid, so the page gets a single
+    element instead of one st.metric per product."""
+    cards = [
+        f'<div style="padding:0.5rem 0">'
+        f'<div style="font-size:0.875rem;opacity:0.7">{html.escape(str(name))}</div>'
+        f'<div style="font-size:2.25rem;line-height:1.3">{quantity:,}</div>'
+        f'</div>'
+        for name, quantity in zip(names, quantities)
+    ]
+    return (
+        f'<div style="display:grid;grid-template-columns:repeat({columns},1fr);gap:0.5rem 1rem">'
+        + ''.join(cards)
+        + '</div>'
+    )
+
+@st.cache_data(max_entries=24)
+def to_csv_bytes(results: pd.DataFrame) -> bytes:
+    """Serializes the full results once per forecast for the download button."""
+    return results.to_csv(index=False).encode()
 
 # ==========================================
 # 3. UI & PREDICTION LOGIC
 # ==========================================
+@st.fragment
+def forecast_panel(selected_month: str, forecast_year: int, top_k: int):
+    """Button and results block; reruns on its own when the button is pressed."""
+    run_forecast = st.button(f"Generate Forecast", type="primary", use_container_width=True)
+
+    # --- Main Logic ---
+    if run_forecast:
+        with st.spinner("Running AI Prediction..."):
+            month_num = MONTH_MAP[selected_month]
+            version = load_artifacts(MODEL_FILE)['version']
+            results = compute_forecast(forecast_year, month_num, version)
+
+            # --- SECTION 1: METRICS ---
+            # Each section renders inside one container so reruns diff a block, not every element
+            with st.container():
+                st.subheader(f"🏆 Production Targets: {selected_month} {forecast_year}")
+
+                # Results are sorted, so the top N non-zero rows are the ones worth a card
+                view = results[results['Suggested Quantity'] > 0].head(top_k)
+                st.markdown(
+                    build_metric_grid(view['Product Name'].to_numpy(), view['Suggested Quantity'].to_numpy()),
+                    unsafe_allow_html=True
+                )
+
+                st.divider()
+
+            # --- SECTION 2: VISUALIZATION ---
+            with st.container():
+                st.subheader("📊 Production Distribution")
+
+                st.altair_chart(build_chart(results), use_container_width=True)
+
+                st.divider()
+
+            # --- SECTION 3: DATA EXPORT ---
+            with st.container():
+                st.subheader("📋 Detailed Data")
+                st.dataframe(results.head(TABLE_ROW_LIMIT), use_container_width=True, hide_index=True)
+                if len(results) > TABLE_ROW_LIMIT:
+                    st.caption(f"Showing the top {TABLE_ROW_LIMIT} of {len(results)} products.")
+                st.download_button(
+                    "Download full CSV",
+                    data=to_csv_bytes(results),
+                    file_name=f"forecast_{selected_month}_{forecast_year}.csv",
+                    mime="text/csv",
+                    on_click="ignore"  # Keep the forecast on screen after downloading
+                )
+
 def main():
     # --- Header ---
     st.title("👕 Clothing Production Forecaster")
@@ -41,16 +148,9 @@ def main():
     st.divider()
 
     # --- Load Model ---
-    artifacts = load_ai_brain()
-    model = artifacts['model']
-    le = artifacts['encoder']
+    artifacts = load_artifacts(MODEL_FILE)
     last_training_year = artifacts['last_year']
 
-    # Generate Month Map
-    # Result: {'January': 1, 'February': 2, ...}
-    month_map = {month: index for index, month in enumerate(calendar.month_name) if month}
-    month_list = list(month_map.keys())
-
     # --- SMART DEFAULT LOGIC ---
     # Get current date to auto-suggest the NEXT month
     today = datetime.now()
@@ -65,7 +165,7 @@ def main():
 
     # Smart Year Logic: If forecasting for next year, adjust year logic if needed
     # (Simple version: use the logic from your artifacts or current date)
-    forecast_year = last_training_year + 1
+    forecast_year = artifacts['forecast_year']  # last_training_year + 1, the year pred_table covers
 
     # --- Sidebar ---
     st.sidebar.header("⚙️ Configuration")
@@ -73,7 +173,7 @@ def main():
     
     selected_month = st.sidebar.selectbox(
         "Select Month for Production",
-        options=month_list,
+        options=MONTH_LIST,
         index=default_list_index  # <--- UPDATED: Now defaults to next month
     )
     
@@ -84,65 +184,14 @@ def main():
     
     st.sidebar.write(f"Target: **{selected_month} {forecast_year}**")
 
-    run_forecast = st.button(f"Generate Forecast", type="primary", use_container_width=True)
+    # Limit how many metric cards are drawn; the full list stays in the table below
+    n_products = len(artifacts['product_names'])
+    if n_products > 5:
+        top_k = st.sidebar.slider("Show top N products", 5, n_products, min(30, n_products))
+    else:
+        top_k = n_products
 
-    # --- Main Logic ---
-    if run_forecast:
-        with st.spinner("Running AI Prediction..."):
-            # 1. Prepare Input Data
-            month_num = month_map[selected_month]
-            all_products = le.classes_
-            
-            input_data = pd.DataFrame({
-                'Year': [forecast_year] * len(all_products),
-                'Month_Num': [month_num] * len(all_products),
-                'Product_ID': le.transform(all_products)
-            })
-
-            # 2. Predict
-            predictions = model.predict(input_data)
-
-            # 3. Format Results
-            results = pd.DataFrame({
-                'Product Name': all_products,
-                'Suggested Quantity': predictions.astype(int)
-            })
-            
-            results = results.sort_values(by='Suggested Quantity', ascending=False).reset_index(drop=True)
-
-            # --- SECTION 1: METRICS ---
-            st.subheader(f"🏆 Production Targets: {selected_month} {forecast_year}")
-            
-            # Dynamic Column Layout
-            # If you have many products, 3 columns might get crowded. 
-            # This is safe, but consider 'st.columns(4)' if you have >12 products.
-            cols = st.columns(3)
-            for index, row in results.iterrows():
-                col = cols[index % 3]
-                col.metric(
-                    label=row['Product Name'], 
-                    value=f"{row['Suggested Quantity']:,}"
-                )
-
-            st.divider()
-
-            # --- SECTION 2: VISUALIZATION ---
-            st.subheader("📊 Production Distribution")
-            
-            chart = alt.Chart(results).mark_bar(cornerRadius=5).encode(
-                x=alt.X('Suggested Quantity', title='Quantity'),
-                y=alt.Y('Product Name', sort='-x', title='Product'),
-                color=alt.Color('Suggested Quantity', scale=alt.Scale(scheme='greens'), legend=None),
-                tooltip=['Product Name', 'Suggested Quantity']
-            ).properties(height=350)
-            
-            st.altair_chart(chart, use_container_width=True)
-
-            st.divider()
-
-            # --- SECTION 3: DATA EXPORT ---
-            st.subheader("📋 Detailed Data")
-            st.dataframe(results, use_container_width=True, hide_index=True)
+    forecast_panel(selected_month, forecast_year, top_k)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
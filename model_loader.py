@@ -0,0 +1,84 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import joblib
+import os
+import calendar
+
+# Month lookups are constant. Streamlit re-executes the app script on every
+# rerun but imports this module only once, so they are built a single time here
+# Result: ['January', ...] and {'January': 1, 'February': 2, ...}
+MONTH_LIST = list(calendar.month_name)[1:]
+MONTH_MAP = {month: index + 1 for index, month in enumerate(MONTH_LIST)}
+
+# Column layout the production model was fitted on
+FEATURE_COLUMNS = ['Year', 'Month_Num', 'Product_ID']
+
+# ==========================================
+# SHARED MODEL LOADING LOGIC
+# ==========================================
+def build_model_input(year: int, month_nums, product_ids) -> pd.DataFrame:
+    """Builds one input row per (month, product), grouped month by month."""
+    n = len(product_ids)
+
+    # Fill one pre-allocated int block instead of building Python lists;
+    # the model was fitted on named columns, so wrap it without copying
+    X = np.empty((len(month_nums) * n, 3), dtype=np.int64)
+    X[:, 0] = year
+    X[:, 1] = np.repeat(month_nums, n)
+    X[:, 2] = np.tile(product_ids, len(month_nums))
+    return pd.DataFrame(X, columns=FEATURE_COLUMNS, copy=False)
+
+def model_version(path: str) -> str:
+    """Identifies the saved model by its modification time, so caches can
+    tell a retrained file apart from the one they were built with."""
+    try:
+        return str(os.path.getmtime(path))
+    except OSError:
+        return "missing"
+
+def _is_current(artifacts: dict) -> bool:
+    """Cache hits stay valid until the file on disk is retrained or removed."""
+    return artifacts['version'] == model_version(artifacts['path'])
+
+@st.cache_resource(validate=_is_current)
+def load_artifacts(path: str) -> dict:
+    """Loads a saved AI brain once per process and normalizes its keys.
+
+    Streamlit keys the resource cache on the path, so every page that loads
+    the same file shares a single in-memory copy. The copy is reloaded
+    automatically when the file's modification time changes.
+    """
+    if not os.path.exists(path):
+        st.error(f"🚨 Critical Error: '{path}' not found.")
+        st.warning("Please run 'train_model.py' first to generate the AI brain.")
+        st.stop()
+    raw = joblib.load(path)
+
+    # Older training runs saved the encoder as 'product_encoder'
+    encoder = raw['encoder'] if 'encoder' in raw else raw['product_encoder']
+
+    artifacts = {
+        'path': path,
+        'version': model_version(path),
+        'model': raw['model'],
+        'encoder': encoder,
+        'month_map': raw.get('month_map', MONTH_MAP),
+        'last_year': raw['last_year'],
+        # Encoded IDs are just 0..n-1 over the sorted classes, so compute them once here
+        # instead of calling le.transform() on every forecast
+        'product_ids': np.arange(len(encoder.classes_), dtype=np.int64),
+        'product_names': encoder.classes_,
+        'forecast_year': raw['last_year'] + 1,
+    }
+
+    # Predict every month of the forecast year in a single call, so picking a
+    # month in the UI is just a row lookup into pred_table (shape: 12 x products)
+    months = np.arange(1, 13)
+    n_products = len(artifacts['product_ids'])
+    inputs = build_model_input(artifacts['forecast_year'], months, artifacts['product_ids'])
+    predictions = artifacts['model'].predict(inputs).reshape(len(months), n_products)
+    # Whole units comfortably fit in int32, half the size of the default int64
+    artifacts['pred_table'] = predictions.astype(np.int32)
+
+    return artifacts